@@ -6,7 +6,10 @@
 
 # -- Path setup --------------------------------------------------------------
 
+import fnmatch
+import hashlib
 import os
+import re
 
 # If extensions (or modules to document with autodoc) are in another directory,
 # add these directories to sys.path here. If the directory is relative to the
@@ -17,7 +20,17 @@ import subprocess
 # -- Read the Doc configuration ----------------------------------------------
 
 
-def configureDoxyfile(input_dir, output_dir):
+def configureDoxyfile(
+    input_dir,
+    output_dir,
+    project,
+    xml_output,
+    inputs,
+    tagfiles,
+    mainpage,
+    bibfiles,
+    patterns,
+):
     with open("Doxyfile.in") as file:
         filedata = file.read()
 
@@ -26,9 +39,125 @@ def configureDoxyfile(input_dir, output_dir):
     filedata = filedata.replace("@DOXYGEN_DOT_FOUND@", "NO")
     filedata = filedata.replace("@DOXYGEN_TAGFILE@", "")
 
-    with open("Doxyfile", "w") as file:
+    # Breathe only consumes the XML output, so skip HTML and LaTeX
+    filedata += "\nGENERATE_HTML = NO\n"
+    filedata += "GENERATE_LATEX = NO\n"
+
+    # Restrict this run to the project's inputs and cross-reference the
+    # projects generated before via their tag files
+    filedata += "INPUT = " + " ".join(input_dir + i for i in inputs) + "\n"
+    filedata += "XML_OUTPUT = " + xml_output + "\n"
+    filedata += "GENERATE_TAGFILE = " + output_dir + project + ".tag\n"
+    filedata += "TAGFILES = " + " ".join(tagfiles) + "\n"
+
+    # Only projects that have a main page or cite references set these, so
+    # that the bibliography is not processed in every run
+    filedata += "USE_MDFILE_AS_MAINPAGE = "
+    filedata += " ".join(input_dir + i for i in mainpage) + "\n"
+    filedata += "CITE_BIB_FILES = "
+    filedata += " ".join(input_dir + i for i in bibfiles) + "\n"
+
+    # Doxygen reads the same files that hashDoxygenInputs hashes
+    filedata += "FILE_PATTERNS = " + " ".join(patterns) + "\n"
+    filedata += "EXAMPLE_PATTERNS = " + " ".join(patterns) + "\n"
+
+    doxyfile = output_dir + "Doxyfile_" + project
+    os.makedirs(output_dir, exist_ok=True)
+    with open(doxyfile, "w") as file:
         file.write(filedata)
 
+    return doxyfile
+
+
+def hashDoxygenInputs(doxyfiles, inputs, patterns):
+    digest = hashlib.sha256()
+
+    # Hash the generated Doxyfiles so that changes to the project layout in
+    # this file invalidate the cache as well as changes to Doxyfile.in
+    for doxyfile in doxyfiles:
+        with open(doxyfile, "rb") as file:
+            digest.update(file.read())
+
+    paths = set()
+    for path in inputs:
+        if os.path.isfile(path):
+            paths.add(os.path.normpath(path))
+        for root, dirs, files in os.walk(path):
+            dirs[:] = [
+                d for d in dirs if d != "_build" and not d.startswith(".")
+            ]
+            for name in files:
+                if any(fnmatch.fnmatch(name, p) for p in patterns):
+                    paths.add(os.path.normpath(os.path.join(root, name)))
+
+    # Hash file contents rather than modification times since the latter
+    # change with every fresh checkout
+    for path in sorted(paths):
+        digest.update(path.encode())
+        with open(path, "rb") as file:
+            digest.update(file.read())
+
+    return digest.hexdigest()
+
+
+def readVersion(cmakelists):
+    # The version is taken from the top-level CMakeLists.txt and not from
+    # git describe, which changes with every commit and thereby invalidates
+    # the pickled Sphinx environment
+    try:
+        with open(cmakelists) as file:
+            filedata = file.read()
+    except OSError:
+        return "dev"
+
+    parts = []
+    for part in ["MAJOR", "MINOR", "PATCH"]:
+        match = re.search(
+            r"set\(\s*iganet_VERSION_" + part + r"\s+(\d+)", filedata
+        )
+        if match is None:
+            return "dev"
+        parts.append(match.group(1))
+
+    return ".".join(parts)
+
+
+# Doxygen projects in build order; each project can reference the symbols
+# of all projects listed before it. Breathe directives select the project
+# they need via the :project: option so that only its XML is loaded.
+doxygen_projects = {
+    "IGAnet_core": "xml_core",
+    "IGAnet_splines": "xml_splines",
+    "IGAnet_geometry": "xml_geometry",
+    "IGAnet_net": "xml_net",
+    "IGAnet_solver": "xml_solver",
+    "IGAnet": "xml",
+}
+
+doxygen_inputs = {
+    "IGAnet_core": [
+        "include/core",
+        "include/core.h",
+        "include/utils",
+        "include/utils.h",
+    ],
+    "IGAnet_splines": ["include/splines", "include/splines.h"],
+    "IGAnet_geometry": ["include/geometry", "include/geometry.h"],
+    "IGAnet_net": ["include/net", "include/net.h"],
+    "IGAnet_solver": ["include/solver", "include/solver.h"],
+    "IGAnet": ["docs/README.md", "docs", "include/iganet.h", "optional"],
+}
+
+doxygen_file_patterns = ["*.c", "*.cpp", "*.cxx", "*.h", "*.hpp", "*.md"]
+
+doxygen_mainpage = {
+    "IGAnet": ["docs/README.md"],
+}
+
+doxygen_bibfiles = {
+    "IGAnet_splines": ["docs/Doxygen.bib"],
+    "IGAnet": ["docs/Doxygen.bib"],
+}
 
 # Check if we're running on Read the Docs' servers
 read_the_docs_build = os.environ.get("READTHEDOCS", None) == "True"
@@ -38,9 +167,54 @@ breathe_projects = {}
 if read_the_docs_build:
     input_dir = "../"
     output_dir = "_build/"
-    configureDoxyfile(input_dir, output_dir)
-    subprocess.call("doxygen", shell=True)
-    breathe_projects["IGAnet"] = output_dir + "xml"
+
+    # Generate the Doxyfiles of all projects up front; each project can use
+    # the tag files of the projects generated before it
+    doxyfiles = []
+    tagfiles = []
+    hash_inputs = []
+    for project, xml_output in doxygen_projects.items():
+        doxyfiles.append(
+            configureDoxyfile(
+                input_dir,
+                output_dir,
+                project,
+                xml_output,
+                doxygen_inputs[project],
+                tagfiles,
+                doxygen_mainpage.get(project, []),
+                doxygen_bibfiles.get(project, []),
+                doxygen_file_patterns,
+            )
+        )
+        tagfiles.append(output_dir + project + ".tag")
+        for i in doxygen_inputs[project] + doxygen_bibfiles.get(project, []):
+            hash_inputs.append(input_dir + i)
+
+    # Doxygen is only rerun if its inputs changed since the last build. This
+    # only pays off where output_dir survives between builds, e.g. repeated
+    # local builds with READTHEDOCS=True or CI jobs caching docs/_build. Read
+    # the Docs itself starts from a fresh checkout and always runs doxygen.
+    hash_file = output_dir + ".doxy_hash"
+    doxygen_hash = hashDoxygenInputs(
+        doxyfiles, hash_inputs, doxygen_file_patterns
+    )
+    try:
+        with open(hash_file) as file:
+            doxygen_outdated = file.read() != doxygen_hash
+    except OSError:
+        doxygen_outdated = True
+
+    if doxygen_outdated or not all(
+        os.path.isdir(output_dir + xml) for xml in doxygen_projects.values()
+    ):
+        for doxyfile in doxyfiles:
+            subprocess.run(["doxygen", doxyfile], check=True)
+        with open(hash_file, "w") as file:
+            file.write(doxygen_hash)
+
+    for project, xml in doxygen_projects.items():
+        breathe_projects[project] = output_dir + xml
 
 
 # -- Project information -----------------------------------------------------
@@ -49,6 +223,14 @@ project = "IGAnet"
 copyright = "2021-2025, Matthias Möller (m.moller@tudelft.nl)"
 author = "Matthias Möller"
 
+# The full version, including patch level; release builds can set it
+# explicitly via IGANET_DOCS_VERSION
+release = os.environ.get("IGANET_DOCS_VERSION") or readVersion(
+    "../CMakeLists.txt"
+)
+# The short X.Y version
+version = ".".join(release.split(".")[:2])
+
 
 # -- General configuration ---------------------------------------------------
 
@@ -105,4 +287,12 @@ html_static_path = ["_static"]
 html_logo = "_static/IGAnet_logo.png"
 
 # Breathe Configuration
+#
+# The default project only contains the README, the tutorials, iganet.h and
+# the optional modules. The C++ API is split across the IGAnet_* projects in
+# doxygen_projects, so directives documenting it must pass the project
+# explicitly, e.g.
+#
+#   .. doxygenclass:: iganet::UniformBSplineCore
+#      :project: IGAnet_splines
 breathe_default_project = "IGAnet"